@@ -1,5 +1,6 @@
 import argparse
 import json
+import re
 import time
 
 WHITESPACES = " \t\n\r\f"
@@ -35,6 +36,111 @@ def check_match(match: str, char: str):
     return char in match
 
 
+def build_skip_table(nodes: dict, starting_state: str):
+    """
+    Parameters
+    ----------
+    nodes : dict
+        the nodes in the DFA
+    starting_state : str
+        the name of the starting node, which is never skipped through
+
+    Returns
+    -------
+    dict
+        a map from the name of each self-looping node to a function that takes
+        the source code and an index, and returns the index of the first
+        character that does not keep the DFA in that node
+    """
+    global EXCLUDE
+
+    skip_table = {}
+    for id in nodes:
+        if id == starting_state:
+            continue
+
+        # Collect the characters leading out of the node before its self-loop,
+        # the first matching child wins so these never stay in the node
+        earlier = ""
+        universe = None
+        loop = None
+        for match, child in nodes[id]["children"].items():
+            if child == id:
+                loop = match
+                break
+            if match.startswith(EXCLUDE):
+                excluded = set(match[len(EXCLUDE):])
+                universe = excluded if universe is None else universe & excluded
+            else:
+                earlier += match
+        if loop is None:
+            continue
+
+        # Work out which characters stay in the node, either as a finite set
+        # or as the complement of a finite set
+        if loop.startswith(EXCLUDE):
+            stops = set(earlier) | set(loop[len(EXCLUDE):])
+            if universe is None:
+                if len(stops) == 1:
+                    skip_table[id] = find_skipper(stops.pop())
+                else:
+                    skip_table[id] = class_skipper(stops, True)
+                continue
+            stays = universe - stops
+        else:
+            stays = set(loop) - set(earlier)
+            if universe is not None:
+                stays &= universe
+        if stays:
+            skip_table[id] = class_skipper(stays, False)
+
+    return skip_table
+
+def find_skipper(stop: str):
+    """
+    Parameters
+    ----------
+    stop : str
+        the only character that leaves the node
+
+    Returns
+    -------
+    function
+        a function returning the index of the next occurrence of the character,
+        or the length of the source if there is none
+    """
+    def skip(source: str, index: int):
+        end = source.find(stop, index)
+        return len(source) if end == -1 else end
+    return skip
+
+def class_skipper(chars: set, negate: bool):
+    """
+    Parameters
+    ----------
+    chars : set
+        the characters of the character class
+    negate : bool
+        whether the node is left on the characters (True) or kept on them (False)
+
+    Returns
+    -------
+    function
+        a function returning the index of the first character after the run of
+        characters that keep the DFA in the node
+    """
+    # An empty class cannot be compiled, it either keeps every character or none
+    if not chars:
+        def skip(source: str, index: int):
+            return len(source) if negate else index
+        return skip
+
+    escaped = "".join(re.escape(char) for char in sorted(chars))
+    pattern = re.compile(f"[{'^' if negate else ''}{escaped}]*")
+    def skip(source: str, index: int):
+        return pattern.match(source, index).end()
+    return skip
+
 def lexer(source: str, nodes: dict, keywords: list, special_literals: list, separators: str, no_comments: bool = False):
     """
     Parameters
@@ -66,6 +172,10 @@ def lexer(source: str, nodes: dict, keywords: list, special_literals: list, sepa
             STARTING_STATE = id
             break
 
+    # Find the self-looping nodes, so runs of characters inside comments,
+    # string literals and identifiers can be consumed at once
+    skip_table = build_skip_table(nodes, STARTING_STATE)
+
     tokens = []
     token = ""
     state = STARTING_STATE
@@ -104,6 +214,13 @@ def lexer(source: str, nodes: dict, keywords: list, special_literals: list, sepa
                 token += char
                 found = True
                 break
+
+        # Jump to the first character leaving the node if it loops on itself
+        if found and state in skip_table:
+            end = skip_table[state](source, index)
+            token += source[index:end]
+            position += end - index
+            index = end
         
         # If no match is found, check if the current state is a terminal state
         if not found: